@@ -1,12 +1,17 @@
 import librosa
 import numpy as np
-import scipy.signal as signal
-from scipy.spatial.distance import cosine
+import scipy.fft
 import json
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
+# スペクトログラムの設定（フォルマント安定性で使用）
+SPEC_N_FFT = 1024
+SPEC_HOP_LENGTH = 256
+SPEC_WINDOW = librosa.filters.get_window("hann", SPEC_N_FFT).astype(np.float32)
+
 def analyze_pronunciation(audio_path: str, reference_text: str) -> Dict:
     """
     高度な音響分析による発音評価（完全書き直し）
@@ -19,17 +24,32 @@ def analyze_pronunciation(audio_path: str, reference_text: str) -> Dict:
         duration = len(y) / sr
         energy = np.mean(librosa.feature.rms(y=y))
         
+        # 共通の特徴量は一度だけ計算して各分析で共有する
+        # （独立した処理なのでスレッドで並行実行、NumPy/FFTの計算中はGILが解放される）
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pitch_future = executor.submit(extract_pitches, y, sr)
+            spec_future = executor.submit(extract_spectrogram, y)
+            rhythm_future = executor.submit(extract_rhythm_features, y, sr)
+            mfcc_future = executor.submit(librosa.feature.mfcc, y=y, sr=sr, n_mfcc=13)
+            
+            valid_pitches = pitch_future.result()
+            spec = spec_future.result()
+            onset_frames, tempo, beats = rhythm_future.result()
+            mfcc = mfcc_future.result()
+        
         # カタカナ発音検出（最重要）
-        katakana_detection = detect_katakana_pronunciation_improved(y, sr)
+        katakana_detection = detect_katakana_pronunciation_improved(
+            valid_pitches, spec, onset_frames
+        )
         
         # ピッチ分析
-        pitch_analysis = analyze_pitch_improved(y, sr)
+        pitch_analysis = analyze_pitch_improved(valid_pitches)
         
         # リズム分析
-        rhythm_analysis = analyze_rhythm_improved(y, sr)
+        rhythm_analysis = analyze_rhythm_improved(tempo, beats, onset_frames, sr)
         
         # 音素分析
-        phoneme_analysis = analyze_phonemes_improved(y, sr)
+        phoneme_analysis = analyze_phonemes_improved(mfcc)
         
         # 総合スコア計算
         overall_score = calculate_final_score(
@@ -57,29 +77,51 @@ def analyze_pronunciation(audio_path: str, reference_text: str) -> Dict:
             "error": str(e)
         }
 
-def detect_katakana_pronunciation_improved(y: np.ndarray, sr: int) -> Dict:
+def extract_pitches(y: np.ndarray, sr: int) -> np.ndarray:
+    """
+    有声ピッチ抽出（各フレームで最大振幅のピッチを一括で取得）
+    """
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    picked = pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+    return picked[picked > 0]
+
+def extract_spectrogram(y: np.ndarray) -> np.ndarray:
+    """
+    振幅スペクトログラム計算（librosa.stftと同じ結果を実数FFTのマルチスレッド実行で求める）
+    """
+    frames = librosa.util.frame(
+        np.pad(y, SPEC_N_FFT // 2), frame_length=SPEC_N_FFT, hop_length=SPEC_HOP_LENGTH
+    )
+    return np.abs(scipy.fft.rfft(frames * SPEC_WINDOW[:, None], axis=0, workers=-1))
+
+def extract_rhythm_features(y: np.ndarray, sr: int) -> Tuple[np.ndarray, float, np.ndarray]:
+    """
+    リズム特徴量抽出（一つのメルスペクトログラムをオンセット検出とビート追跡で共有）
+    """
+    # onset_strength(y=...)が内部で計算するものと同じ対数メルスペクトログラム
+    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr))
+    onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr)
+    # beat_trackの既定と同じく中央値で集約
+    beat_env = librosa.onset.onset_strength(S=mel_db, sr=sr, aggregate=np.median)
+    tempo, beats = librosa.beat.beat_track(onset_envelope=beat_env, sr=sr)
+    # librosa 0.10.2以降はテンポが要素数1の配列で返るためスカラーに戻す
+    tempo = float(np.atleast_1d(tempo)[0])
+    return onset_frames, tempo, beats
+
+def detect_katakana_pronunciation_improved(valid_pitches: np.ndarray, spec: np.ndarray,
+                                           onset_frames: np.ndarray) -> Dict:
     """
     カタカナ発音検出（改善版）
     """
     # 1. ピッチの平坦さを検出
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    valid_pitches = []
-    for t in range(pitches.shape[1]):
-        index = magnitudes[:, t].argmax()
-        pitch = pitches[index, t]
-        if pitch > 0:
-            valid_pitches.append(pitch)
-    
-    pitch_variance = np.var(valid_pitches) if valid_pitches else 0
+    pitch_variance = np.var(valid_pitches) if valid_pitches.size else 0
     
     # 2. フォルマントの安定性
-    stft = librosa.stft(y, n_fft=1024, hop_length=256)
-    spec = np.abs(stft)
     formant_stability = calculate_formant_stability(spec)
     
     # 3. リズムの不自然さ
-    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-    rhythm_naturalness = calculate_rhythm_naturalness(y, sr)
+    rhythm_naturalness = calculate_rhythm_naturalness(onset_frames)
     
     # カタカナ発音の特徴
     katakana_indicators = []
@@ -108,24 +150,14 @@ def detect_katakana_pronunciation_improved(y: np.ndarray, sr: int) -> Dict:
         "rhythm_naturalness": float(rhythm_naturalness)
     }
 
-def analyze_pitch_improved(y: np.ndarray, sr: int) -> Dict:
+def analyze_pitch_improved(valid_pitches: np.ndarray) -> Dict:
     """
     ピッチ分析（改善版）
     """
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    valid_pitches = []
-    
-    for t in range(pitches.shape[1]):
-        index = magnitudes[:, t].argmax()
-        pitch = pitches[index, t]
-        if pitch > 0:
-            valid_pitches.append(pitch)
-    
-    if valid_pitches:
-        valid_pitches = np.array(valid_pitches)
+    if valid_pitches.size:
         mean_pitch = np.mean(valid_pitches)
         pitch_std = np.std(valid_pitches)
-        pitch_range = np.max(valid_pitches) - np.min(valid_pitches)
+        pitch_range = np.ptp(valid_pitches)
         
         # スコア計算
         score = 0
@@ -150,12 +182,11 @@ def analyze_pitch_improved(y: np.ndarray, sr: int) -> Dict:
         "score": 0
     }
 
-def analyze_rhythm_improved(y: np.ndarray, sr: int) -> Dict:
+def analyze_rhythm_improved(tempo: float, beats: np.ndarray,
+                            onset_frames: np.ndarray, sr: int) -> Dict:
     """
     リズム分析（改善版）
     """
-    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-    onset_frames = librosa.onset.onset_detect(y=y, sr=sr)
     onset_times = librosa.frames_to_time(onset_frames, sr=sr)
     
     # リズムの一貫性
@@ -181,13 +212,14 @@ def analyze_rhythm_improved(y: np.ndarray, sr: int) -> Dict:
         "score": float(score)
     }
 
-def analyze_phonemes_improved(y: np.ndarray, sr: int) -> Dict:
+def analyze_phonemes_improved(mfcc: np.ndarray) -> Dict:
     """
     音素分析（改善版）
     """
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
     mfcc_diff = np.diff(mfcc, axis=1)
-    change_points = np.sum(np.abs(mfcc_diff), axis=0)
+    # 差分配列をそのまま絶対値に置き換えて一時配列を作らない
+    np.abs(mfcc_diff, out=mfcc_diff)
+    change_points = mfcc_diff.sum(axis=0)
     
     # 変化点の検出
     threshold = np.mean(change_points) + np.std(change_points)
@@ -251,16 +283,19 @@ def calculate_formant_stability(spec: np.ndarray) -> float:
     try:
         # スペクトラムの時間変化を計算
         spec_diff = np.diff(spec, axis=1)
-        stability = 1.0 / (1.0 + np.mean(np.std(spec_diff, axis=0)))
+        # 列ごとの標準偏差を差分配列の上で直接計算し、np.stdの一時配列を省く
+        spec_diff -= spec_diff.mean(axis=0)
+        np.square(spec_diff, out=spec_diff)
+        col_std = np.sqrt(spec_diff.mean(axis=0))
+        stability = 1.0 / (1.0 + np.mean(col_std))
         return float(stability)
     except:
         return 0.5
 
-def calculate_rhythm_naturalness(y: np.ndarray, sr: int) -> float:
+def calculate_rhythm_naturalness(onset_frames: np.ndarray) -> float:
     """リズム自然性計算"""
     try:
         # オンスセット間隔の自然性
-        onset_frames = librosa.onset.onset_detect(y=y, sr=sr)
         if len(onset_frames) > 1:
             intervals = np.diff(onset_frames)
             naturalness = 1.0 / (1.0 + np.std(intervals))